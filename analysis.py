@@ -5,6 +5,7 @@ Simple alpha signal analysis
 import pandas as pd
 import numpy as np
 from scipy import stats
+import config
 
 class AlphaSignalAnalyzer:
     """Simple class to analyze alpha signals"""
@@ -117,8 +118,10 @@ class AlphaSignalAnalyzer:
     def _analyze_probability_ranges(self, data):
         """Analyze returns based on win probability ranges."""
         print(f"\n#️⃣ PROBABILITY RANGES")
-        high_prob_matches = data[data['bvb_win_prob'] > 0.6]
-        low_prob_matches = data[data['bvb_win_prob'] < 0.4]
+        high_threshold = config.HIGH_WIN_PROB_THRESHOLD
+        low_threshold = config.LOW_WIN_PROB_THRESHOLD
+        high_prob_matches = data[data['bvb_win_prob'] > high_threshold]
+        low_prob_matches = data[data['bvb_win_prob'] < low_threshold]
         
         if high_prob_matches.empty or low_prob_matches.empty:
             print("  Not enough data for high/low probability comparison.")
@@ -127,8 +130,8 @@ class AlphaSignalAnalyzer:
         high_prob_return = high_prob_matches['next_day_return'].mean()
         low_prob_return = low_prob_matches['next_day_return'].mean()
         
-        print(f"  High prob (>60%) return: {high_prob_return:+.4f}")
-        print(f"  Low prob (<40%) return:  {low_prob_return:+.4f}")
+        print(f"  High prob (>{high_threshold:.0%}) return: {high_prob_return:+.4f}")
+        print(f"  Low prob (<{low_threshold:.0%}) return:  {low_prob_return:+.4f}")
         
         if len(high_prob_matches) > 5 and len(low_prob_matches) > 5:
             _, p_value = stats.ttest_ind(high_prob_matches['next_day_return'], low_prob_matches['next_day_return'])
@@ -137,8 +140,10 @@ class AlphaSignalAnalyzer:
     def _analyze_bookmaker_margins(self, data):
         """Analyze returns based on bookmaker margin."""
         print(f"\n💰 BOOKMAKER MARGINS")
-        low_margin = data[data['bookmaker_margin'] < 0.05]
-        high_margin = data[data['bookmaker_margin'] > 0.1]
+        low_threshold = config.LOW_MARGIN_THRESHOLD
+        high_threshold = config.HIGH_MARGIN_THRESHOLD
+        low_margin = data[data['bookmaker_margin'] < low_threshold]
+        high_margin = data[data['bookmaker_margin'] > high_threshold]
 
         if low_margin.empty or high_margin.empty:
             print("  Not enough data for high/low margin comparison.")
@@ -149,8 +154,8 @@ class AlphaSignalAnalyzer:
         low_margin_vol = low_margin['next_day_return'].abs().mean()
         high_margin_vol = high_margin['next_day_return'].abs().mean()
         
-        print(f"  Low margin (<5%) : return={low_margin_return:+.4f}, vol={low_margin_vol:.4f}")
-        print(f"  High margin (>10%): return={high_margin_return:+.4f}, vol={high_margin_vol:.4f}")
+        print(f"  Low margin (<{low_threshold:.0%}) : return={low_margin_return:+.4f}, vol={low_margin_vol:.4f}")
+        print(f"  High margin (>{high_threshold:.0%}): return={high_margin_return:+.4f}, vol={high_margin_vol:.4f}")
         
         if len(low_margin) > 5 and len(high_margin) > 5:
             _, vol_p_value = stats.ttest_ind(low_margin['next_day_return'].abs(), high_margin['next_day_return'].abs())
@@ -163,7 +168,8 @@ class AlphaSignalAnalyzer:
         """
         print(f"\n🎭 SURPRISE FACTOR ANALYSIS")
         
-        high_surprise = data[data['surprise_factor'] > 0.7]
+        threshold = config.SURPRISE_THRESHOLD
+        high_surprise = data[data['surprise_factor'] > threshold]
         n_high = len(high_surprise)
         
         if high_surprise.empty:
@@ -171,7 +177,7 @@ class AlphaSignalAnalyzer:
             return
 
         # --- Behavioral Bias Test ---
-        print(f"  (For events with surprise factor > 0.7) – n = {n_high}")
+        print(f"  (For events with surprise factor > {threshold}) – n = {n_high}")
         
         # Primary Correlation Test:
         # A negative correlation suggests OVERREACTION (reversal).
@@ -8,20 +8,46 @@ import os
 DATA_DIR = "data"
 RESULTS_DIR = "results"
 PLOTS_DIR = "plots"
+CACHE_DIR = "cache"
 
 # Create directories
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(RESULTS_DIR, exist_ok=True)
 os.makedirs(PLOTS_DIR, exist_ok=True)
+os.makedirs(CACHE_DIR, exist_ok=True)
 
 # Data Sources
 KAGGLE_DATASET = "austro/beat-the-bookie-worldwide-football-dataset"
 STOCK_TICKER = "BVB.DE"
 TARGET_TEAM = "Dortmund"
+PRICE_START_DATE = "2005-01-01"
+PRICE_END_DATE = None  # None = today (cached by the pipeline until forced)
+
+# Analysis - matches above this surprise factor feed the mean-reversion tests and model
+SURPRISE_THRESHOLD = 0.7
+HIGH_WIN_PROB_THRESHOLD = 0.6
+LOW_WIN_PROB_THRESHOLD = 0.4
+LOW_MARGIN_THRESHOLD = 0.05
+HIGH_MARGIN_THRESHOLD = 0.10
 
 # Model Parameters
 TRAIN_TEST_SPLIT = 0.7
 RANDOM_STATE = 42
+MODEL_RETRAIN_MIN_NEW_ROWS = 25  # refit the persisted correction model once this many new matches arrive
+
+# Explainability - SHAP values are computed in row batches and cached per model
+SHAP_BATCH_SIZE = 256
+SHAP_THREAD_COUNT = -1  # -1 = use all available cores
+
+# Cross-validation - purged/embargoed time-series K-fold over match_date
+# (purging uses each row's real label_end_date, so only the embargo is a day count)
+CV_N_SPLITS = 5
+CV_EMBARGO_DAYS = 5
+CV_MAX_WORKERS = 4
+
+# Pipeline runner - independent stages run concurrently
+PIPELINE_MAX_WORKERS = 4
+PIPELINE_CACHE_KEEP = 2  # cached outputs kept per stage (older keys are pruned)
 
 # Feature Columns - Only PRE-MATCH actionable features
 FEATURE_COLUMNS = [
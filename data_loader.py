@@ -120,7 +120,7 @@ class StockDataLoader:
     def download_data(self, start_date=None, end_date=None):
         """Download stock data from Yahoo Finance"""
         if start_date is None:
-            start_date = "2005-01-01"
+            start_date = config.PRICE_START_DATE
         if end_date is None:
             end_date = datetime.now()
         
@@ -0,0 +1,131 @@
+"""
+Per-match SHAP explanations for the correction model.
+Values are computed in batches and cached on disk, so re-explaining the
+history or a new match day only touches rows that have not been seen yet.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from catboost import Pool
+
+import config
+
+
+class ShapExplainer:
+    """Compute and cache per-sample SHAP and SHAP interaction values for a CatBoost model"""
+
+    def __init__(self, model, cache_dir=None, batch_size=None, thread_count=None):
+        self.model = model
+        self.cache_dir = cache_dir if cache_dir is not None else config.CACHE_DIR
+        self.batch_size = batch_size if batch_size is not None else config.SHAP_BATCH_SIZE
+        self.thread_count = thread_count if thread_count is not None else config.SHAP_THREAD_COUNT
+        self.fingerprint = self._model_fingerprint(model)
+
+    @staticmethod
+    def _model_fingerprint(model):
+        """
+        Hash the exported trees so the cache is invalidated whenever the model changes.
+        The JSON export's `model_info` carries per-fit metadata (model_guid, train_finish_time),
+        so it is dropped - otherwise two identical fits would never share a cache. get_params()
+        is left out too: it differs between a fresh fit and the same model reloaded from disk.
+        """
+        fd, tmp_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            model.save_model(tmp_path, format="json")
+            with open(tmp_path) as fh:
+                exported = json.load(fh)
+        finally:
+            os.remove(tmp_path)
+
+        exported.pop("model_info", None)
+        return hashlib.sha256(json.dumps(exported, sort_keys=True).encode()).hexdigest()
+
+    def _cache_path(self, kind):
+        return os.path.join(self.cache_dir, f"shap_{kind}_{self.fingerprint[:16]}.npz")
+
+    def _load_cache(self, kind):
+        """Return {row_id: (row_hash, values)} for everything already computed with this model"""
+        path = self._cache_path(kind)
+        if not os.path.exists(path):
+            return {}
+        with np.load(path) as cached:
+            if "row_hashes" not in cached.files:
+                return {}
+            return dict(zip(cached["row_ids"], zip(cached["row_hashes"], cached["values"])))
+
+    def _save_cache(self, kind, cache):
+        """Write the cache atomically so an interrupted run never leaves a corrupt file"""
+        path = self._cache_path(kind)
+        tmp_path = f"{path}.tmp.npz"
+        row_ids = np.array(list(cache.keys()), dtype=str)
+        row_hashes = np.array([row_hash for row_hash, _ in cache.values()], dtype=np.uint64)
+        values = np.stack([values for _, values in cache.values()]).astype(np.float32)
+        np.savez(tmp_path, row_ids=row_ids, row_hashes=row_hashes, values=values)
+        os.replace(tmp_path, path)
+        self._prune_stale_caches(kind)
+
+    def _prune_stale_caches(self, kind):
+        """Delete caches left behind by earlier models - their values can never be hit again"""
+        for stale in glob.glob(os.path.join(self.cache_dir, f"shap_{kind}_*.npz")):
+            if stale != self._cache_path(kind):
+                os.remove(stale)
+
+    def _compute(self, X, kind):
+        """Run CatBoost's SHAP computation batch by batch and return float32 values"""
+        fstr_type = "ShapValues" if kind == "values" else "ShapInteractionValues"
+        batches = []
+        for start in range(0, len(X), self.batch_size):
+            batch = X.iloc[start:start + self.batch_size]
+            batch_values = self.model.get_feature_importance(
+                Pool(batch),
+                type=fstr_type,
+                thread_count=self.thread_count,
+            )
+            batches.append(np.asarray(batch_values, dtype=np.float32))
+        return np.concatenate(batches)
+
+    def _explain(self, X, row_ids, kind):
+        row_ids = np.asarray(row_ids).astype(str)
+        if len(row_ids) != len(X):
+            raise ValueError("row_ids must have one entry per row of X")
+        if len(set(row_ids)) != len(row_ids):
+            raise ValueError("row_ids must be unique")
+
+        # A row whose features changed since it was cached is treated as a miss
+        row_hashes = pd.util.hash_pandas_object(X, index=False).values.astype(np.uint64)
+        cache = self._load_cache(kind)
+        missing = np.array(
+            [rid not in cache or cache[rid][0] != row_hash for rid, row_hash in zip(row_ids, row_hashes)],
+            dtype=bool,
+        )
+
+        if missing.any():
+            print(f"  Computing SHAP {kind} for {missing.sum()} new or changed rows ({(~missing).sum()} cached)",
+                  file=sys.stderr)
+            fresh = self._compute(X[missing], kind)
+            cache.update(zip(row_ids[missing], zip(row_hashes[missing], fresh)))
+            self._save_cache(kind, cache)
+
+        return np.stack([cache[rid][1] for rid in row_ids]).astype(np.float32, copy=False)
+
+    def shap_values(self, X: pd.DataFrame, row_ids) -> np.ndarray:
+        """
+        Per-sample SHAP values, shape (n_rows, n_features + 1).
+        As in CatBoost, the last column holds the expected value (model bias).
+        """
+        return self._explain(X, row_ids, "values")
+
+    def shap_interaction_values(self, X: pd.DataFrame, row_ids) -> np.ndarray:
+        """
+        Per-sample SHAP interaction values, shape (n_rows, n_features + 1, n_features + 1).
+        As in CatBoost, the last row/column holds the expected value (model bias).
+        """
+        return self._explain(X, row_ids, "interactions")
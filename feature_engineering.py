@@ -16,6 +16,11 @@ class AlphaFeatureEngineer:
         """Find the next available trading day after match date (match date can be on weekend)"""
         next_dates = stock_data.index[stock_data.index > match_date]
         return next_dates[0] if len(next_dates) > 0 else None
+
+    def _get_label_end_date(self, next_trading_day, stock_data):
+        """Last trading day covered by three_day_return (3 trading days after next_trading_day)"""
+        end_pos = stock_data.index.get_loc(next_trading_day) + 3
+        return stock_data.index[end_pos] if end_pos < len(stock_data.index) else pd.NaT
     
     def _normalize_probabilities(self, home_prob, draw_prob, away_prob):
         """Normalize probabilities to remove bookmaker margin"""
@@ -99,6 +104,7 @@ class AlphaFeatureEngineer:
                     'match_id': match['match_id'],
                     'match_date': match_date,
                     'next_trading_day': next_trading_day,
+                    'label_end_date': self._get_label_end_date(next_trading_day, stock_data),
                     'next_day_return': next_day_return,
                     'three_day_return': three_day_return,
                     'stock_up_next_day': 1 if next_day_return > 0 else 0,
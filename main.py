@@ -24,7 +24,7 @@ def main():
     
     if not os.path.exists(dataset_path):
         print("❌ No existing alpha dataset found!")
-        print("Please run the full data collection pipeline first.")
+        print("Please run the full data collection pipeline first: python pipeline.py")
         return
     
     alpha_dataset = pd.read_csv(dataset_path)
@@ -1,31 +1,120 @@
 """
 Train a model that predicts the 2-to-3-day correction following high-surprise matches.
 Runs CatBoost on surprise factor, Day-1 move and league context.
+Progress messages go to stderr; stdout carries only the results report.
 """
 
+import hashlib
+import json
+import os
+import sys
+
 import pandas as pd
-from catboost import CatBoostRegressor, Pool
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
+from catboost import CatBoostRegressor
 import numpy as np
 import config
+from explainability import ShapExplainer
+from validation import PurgedTimeSeriesCV
 
+MODEL_PARAMS = dict(
+    iterations=500,
+    depth=4,
+    learning_rate=0.03,
+    loss_function="RMSE",
+    random_seed=config.RANDOM_STATE,
+    verbose=False,
+)
 
-def _load_data(path=f"{config.RESULTS_DIR}/alpha_dataset.csv", threshold: float = 0.7) -> pd.DataFrame:
-    """Return only high-surprise games and derive correction_return if missing."""
-    df = pd.read_csv(path, parse_dates=["match_date"])
+MODEL_PATH = f"{config.CACHE_DIR}/correction_model.cbm"
+MODEL_META_PATH = f"{config.CACHE_DIR}/correction_model.json"
 
+
+def _select_high_surprise(df: pd.DataFrame, threshold: float = None) -> pd.DataFrame:
+    """Return only high-surprise games and derive correction_return if missing."""
+    if threshold is None:
+        threshold = config.SURPRISE_THRESHOLD
     if "correction_return" not in df.columns and {
         "next_day_return", "three_day_return"
     }.issubset(df.columns):
+        df = df.copy()
         df["correction_return"] = (1 + df["three_day_return"]) / (1 + df["next_day_return"]) - 1
 
     df = df.dropna(subset=["surprise_factor", "next_day_return", "correction_return"])
     return df[df["surprise_factor"] > threshold].copy()
 
 
-def generate_correction_model():
-    data = _load_data()
+def _load_data(path=f"{config.RESULTS_DIR}/alpha_dataset.csv", threshold: float = None) -> pd.DataFrame:
+    """Read the alpha dataset from disk and keep the high-surprise games."""
+    df = pd.read_csv(path, parse_dates=["match_date"])
+    return _select_high_surprise(df, threshold)
+
+
+def _label_end_dates(data: pd.DataFrame) -> pd.Series:
+    """Last trading day of each row's correction_return label, used to purge CV folds."""
+    if "label_end_date" in data.columns:
+        return pd.to_datetime(data["label_end_date"])
+
+    # Datasets built before label_end_date existed: 3 business days is exact except
+    # around exchange holidays - rebuild features for exact purging.
+    print("⚠️  alpha_dataset has no label_end_date – approximating it; re-run feature_engineering.py",
+          file=sys.stderr)
+    return pd.to_datetime(data["next_trading_day"]) + pd.offsets.BDay(3)
+
+
+def _training_data_hash(X: pd.DataFrame, y: pd.Series, match_ids: pd.Series) -> str:
+    """Hash of the training rows (order-independent), feature set and model params."""
+    order = np.argsort(match_ids.values, kind="stable")
+    digest = hashlib.sha256(pd.util.hash_pandas_object(X.iloc[order], index=False).values.tobytes())
+    digest.update(pd.util.hash_pandas_object(y.iloc[order], index=False).values.tobytes())
+    digest.update(json.dumps(list(X.columns)).encode())
+    digest.update(json.dumps(MODEL_PARAMS, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _load_or_fit_model(X: pd.DataFrame, y: pd.Series, match_ids: pd.Series) -> CatBoostRegressor:
+    """
+    Reuse the persisted model while the matches it was trained on are unchanged and fewer
+    than MODEL_RETRAIN_MIN_NEW_ROWS new matches have arrived. New match days are then
+    explained with that model (only their SHAP values are computed) instead of a refit
+    that would invalidate the whole SHAP cache.
+    """
+    match_ids = match_ids.astype(str)
+
+    if os.path.exists(MODEL_PATH) and os.path.exists(MODEL_META_PATH):
+        with open(MODEL_META_PATH) as fh:
+            meta = json.load(fh)
+        trained = match_ids.isin(meta["match_ids"]).values
+        n_new = len(match_ids) - trained.sum()
+
+        if (
+            trained.sum() == len(meta["match_ids"])
+            and n_new < config.MODEL_RETRAIN_MIN_NEW_ROWS
+            and _training_data_hash(X[trained], y[trained], match_ids[trained]) == meta["data_hash"]
+        ):
+            print(f"♻️  Reusing persisted correction model ({n_new} matches added since its fit)", file=sys.stderr)
+            model = CatBoostRegressor()
+            model.load_model(MODEL_PATH)
+            return model
+
+    print("🧠  Training final CatBoost regressor on the full sample…", file=sys.stderr)
+    model = CatBoostRegressor(**MODEL_PARAMS)
+    model.fit(X, y)
+
+    # Write model + metadata atomically so a crash never pairs a model with the wrong data hash
+    model.save_model(f"{MODEL_PATH}.tmp")
+    os.replace(f"{MODEL_PATH}.tmp", MODEL_PATH)
+    with open(f"{MODEL_META_PATH}.tmp", "w") as fh:
+        json.dump({
+            "data_hash": _training_data_hash(X, y, match_ids),
+            "match_ids": match_ids.tolist(),
+        }, fh)
+    os.replace(f"{MODEL_META_PATH}.tmp", MODEL_META_PATH)
+    return model
+
+
+def generate_correction_model(alpha_dataset=None):
+    """Train the correction model on `alpha_dataset`, or on the saved CSV if none is given."""
+    data = _load_data() if alpha_dataset is None else _select_high_surprise(alpha_dataset)
     print(f"High-surprise sample: {len(data)} matches")
 
     feature_cols = [
@@ -41,42 +130,56 @@ def generate_correction_model():
     ]
 
     X, y = data[feature_cols].fillna(0), data["correction_return"]
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.25, random_state=config.RANDOM_STATE
-    )
-    print(f"Train n = {len(X_train)}, Test n = {len(X_test)}")
-
-    model = CatBoostRegressor(
-        iterations=500,
-        depth=4,
-        learning_rate=0.03,
-        loss_function="RMSE",
-        random_seed=config.RANDOM_STATE,
-        verbose=False,
-    )
-
-    print("🧠  Training CatBoost regressor…")
-    model.fit(X_train, y_train)
-
-    preds = model.predict(X_test)
-    rmse = np.sqrt(mean_squared_error(y_test, preds))
-    r2 = r2_score(y_test, preds)
-    direction_acc = (np.sign(preds) == np.sign(y_test)).mean()
-
-    print(f"\n📋  Hold-out metrics:\n  RMSE = {rmse:.4f}\n  R²   = {r2:.3f}\n  Sign accuracy = {direction_acc:.2%}")
+
+    # --- Purged time-series cross-validation ---------------------------------
+    # One random hold-out is too noisy on a few hundred rows, so we report the
+    # spread across K contiguous date blocks instead.
+    # Built per call so CV settings are read from config when the model is trained;
+    # fold indices and quantized train pools are cached on disk, not on this object.
+    cv = PurgedTimeSeriesCV()
+    print(f"🧠  Cross-validating CatBoost regressor ({cv.n_splits} purged folds)…", file=sys.stderr)
+    fold_metrics = cv.evaluate(MODEL_PARAMS, X, y, data["match_date"], _label_end_dates(data))
+    summary = cv.summarize(fold_metrics)
+
+    print("\n📋  Cross-validation metrics (per fold):")
+    for fold, row in fold_metrics.iterrows():
+        print(f"  Fold {fold}: train n = {row['train_n']:.0f}, test n = {row['test_n']:.0f}, "
+              f"RMSE = {row['rmse']:.4f}, R² = {row['r2']:.3f}, Sign accuracy = {row['sign_accuracy']:.2%}")
+    print("\n  Aggregate (mean ± std):")
+    print(f"  RMSE = {summary.loc['rmse', 'mean']:.4f} ± {summary.loc['rmse', 'std']:.4f}")
+    print(f"  R²   = {summary.loc['r2', 'mean']:.3f} ± {summary.loc['r2', 'std']:.3f}")
+    print(f"  Sign accuracy = {summary.loc['sign_accuracy', 'mean']:.2%} ± {summary.loc['sign_accuracy', 'std']:.2%}")
+
+    model = _load_or_fit_model(X, y, data["match_id"])
 
     # --- SHAP-based feature importances -------------------------------------
-    # CatBoost can return SHAP (Shapley) values per sample; the last column is
-    # the expected value, so we drop it and take the mean absolute contribution
-    # of each feature across the hold-out set.
+    # True per-match Shapley values (cached per model fingerprint and match_id).
+    # The last column is the expected value, so we drop it and take the mean
+    # absolute contribution of each feature across the full history.
+    explainer = ShapExplainer(model)
+    match_ids = data["match_id"]
+    shap_values = explainer.shap_values(X, match_ids)[:, :-1]
+    mean_abs = np.abs(shap_values).mean(axis=0)
+    shap_pct = 100 * mean_abs / mean_abs.sum()
+
     print("\nSHAP-based feature importances (percentage of total):")
-    shap_pct = model.get_feature_importance(
-        Pool(X_test, label=y_test),
-        type="PredictionValuesChange",  # already normalised to sum to 100
-    )
     for f, imp in sorted(zip(feature_cols, shap_pct), key=lambda x: x[1], reverse=True):
         print(f"  {f:22s}: {imp:5.1f}%")
 
+    # Strongest pairwise interactions (off-diagonal, mean absolute value)
+    interactions = explainer.shap_interaction_values(X, match_ids)[:, :-1, :-1]
+    mean_abs_int = np.abs(interactions).mean(axis=0)
+    pairs = [
+        (feature_cols[i], feature_cols[j], 2 * mean_abs_int[i, j])
+        for i in range(len(feature_cols))
+        for j in range(i + 1, len(feature_cols))
+    ]
+    print("\nStrongest SHAP interactions (mean |value|):")
+    for f1, f2, val in sorted(pairs, key=lambda x: x[2], reverse=True)[:5]:
+        print(f"  {f1} × {f2}: {val:.5f}")
+
+    return model, explainer, fold_metrics
+
 
 if __name__ == "__main__":
     generate_correction_model() 
\ No newline at end of file
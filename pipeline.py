@@ -0,0 +1,366 @@
+"""
+Stage-based pipeline runner for the full alpha mining workflow.
+Each stage output is keyed by a hash of its code, config parameters and upstream
+outputs, so a rerun only executes stages whose inputs actually changed.
+
+    dataset_fetch → load → team_filter ─┐
+                          price_history ┴→ features ┬→ analysis
+                                                    └→ model
+"""
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import io
+import json
+import os
+import pickle
+import re
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+
+import pandas as pd
+
+import config
+from analysis import AlphaSignalAnalyzer
+from data_loader import BettingDataLoader, StockDataLoader
+from feature_engineering import AlphaFeatureEngineer
+
+
+class Stage:
+    """A named pipeline step: `func(*upstream_outputs)` plus everything its result depends on"""
+
+    def __init__(self, name, func, deps=(), params=(), modules=(), salt=None,
+                 always_run=False, show_cached_report=False):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        # config attributes and modules whose source feed into the stage key
+        self.params = tuple(params)
+        self.modules = tuple(modules)
+        # Optional callable for inputs that are not plain config values (e.g. "today")
+        self.salt = salt
+        # Source stages re-check the outside world every run; downstream
+        # staleness is then decided by the hash of what they return.
+        self.always_run = always_run
+        # Replay the stored report when the stage is skipped (analysis results, CV metrics…)
+        self.show_cached_report = show_cached_report
+
+
+class _ThreadStdout:
+    """sys.stdout proxy that sends prints from a capturing thread to that thread's buffer"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def capture(self):
+        self._local.buffer = io.StringIO()
+
+    def release(self):
+        buffer, self._local.buffer = self._local.buffer, None
+        return buffer.getvalue()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def _hash_output(output):
+    """Content hash of a stage output"""
+    if isinstance(output, pd.DataFrame):
+        digest = hashlib.sha256(pd.util.hash_pandas_object(output, index=True).values.tobytes())
+        digest.update(repr(list(output.columns)).encode())
+        return digest.hexdigest()
+    return hashlib.sha256(pickle.dumps(output)).hexdigest()
+
+
+class PipelineRunner:
+    """Run a DAG of stages, skipping up-to-date ones and running independent ones in parallel"""
+
+    def __init__(self, stages, cache_dir=None, max_workers=None, keep=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_dir = os.path.join(cache_dir if cache_dir is not None else config.CACHE_DIR, "pipeline")
+        self.max_workers = max_workers if max_workers is not None else config.PIPELINE_MAX_WORKERS
+        self.keep = keep if keep is not None else config.PIPELINE_CACHE_KEEP
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        for stage in stages:
+            unknown = [d for d in stage.deps if d not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {unknown}")
+
+        self._keys = {}
+        self._hashes = {}
+        self._outputs = {}
+        self._load_lock = threading.Lock()
+        self._stdout = None
+
+    @property
+    def leaves(self):
+        """Stages nothing else depends on - the default targets"""
+        upstream = {dep for stage in self.stages.values() for dep in stage.deps}
+        return [name for name in self.stages if name not in upstream]
+
+    @staticmethod
+    def _code_hash(stage):
+        """Hash of the stage function plus the modules that implement it"""
+        digest = hashlib.sha256(inspect.getsource(stage.func).encode())
+        for module_name in stage.modules:
+            with open(importlib.import_module(module_name).__file__, "rb") as fh:
+                digest.update(fh.read())
+        return digest.hexdigest()
+
+    def _stage_key(self, stage):
+        digest = hashlib.sha256(stage.name.encode())
+        digest.update(self._code_hash(stage).encode())
+        for param in stage.params:
+            digest.update(f"{param}={getattr(config, param)!r};".encode())
+        if stage.salt is not None:
+            digest.update(f"salt={stage.salt()};".encode())
+        for dep in stage.deps:
+            digest.update(f"{dep}={self._hashes[dep]};".encode())
+        return digest.hexdigest()[:16]
+
+    def _paths(self, name, key):
+        base = os.path.join(self.cache_dir, f"{name}_{key}")
+        return f"{base}.pkl", f"{base}.json"
+
+    def output(self, name):
+        """Return a stage output, loading it from the cache only when somebody needs it"""
+        with self._load_lock:
+            if name not in self._outputs:
+                output_path, _ = self._paths(name, self._keys[name])
+                self._outputs[name] = pd.read_pickle(output_path)
+            return self._outputs[name]
+
+    def _run_stage(self, stage, force):
+        """Return (key, output_hash, report, executed) for one stage"""
+        key = self._stage_key(stage)
+        output_path, meta_path = self._paths(stage.name, key)
+
+        if not (force or stage.always_run) and os.path.exists(output_path) and os.path.exists(meta_path):
+            with open(meta_path) as fh:
+                meta = json.load(fh)
+            return key, meta["output_hash"], meta.get("report", ""), False
+
+        self._stdout.stream.write(f"▶️  {stage.name}: running ({key})…\n")
+        self._stdout.capture()
+        try:
+            output = stage.func(*(self.output(dep) for dep in stage.deps))
+        except BaseException:
+            self._stdout.stream.write(self._stdout.release())
+            raise
+        report = self._stdout.release()
+        output_hash = _hash_output(output)
+
+        pd.to_pickle(output, output_path)
+        with open(meta_path, "w") as fh:
+            json.dump({"stage": stage.name, "key": key, "output_hash": output_hash, "report": report}, fh)
+
+        with self._load_lock:
+            self._outputs[stage.name] = output
+        self._prune(stage.name)
+        return key, output_hash, report, True
+
+    def _prune(self, name):
+        """Keep only the `keep` most recently written keys of a stage (e.g. daily price salts)"""
+        pattern = re.compile(rf"^{re.escape(name)}_([0-9a-f]{{16}})\.json$")
+        metas = [
+            os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if pattern.match(f)
+        ]
+        metas.sort(key=os.path.getmtime, reverse=True)
+        for meta_path in metas[self.keep:]:
+            for path in (meta_path, f"{meta_path[:-len('.json')]}.pkl"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _required(self, targets):
+        """Targets plus everything upstream of them"""
+        required, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'")
+            if name not in required:
+                required.add(name)
+                stack.extend(self.stages[name].deps)
+        return required
+
+    def run(self, targets=None, force=()):
+        """
+        Bring `targets` (default: the leaf stages) up to date and return their cache keys.
+        Outputs are not loaded here - call `output(name)` for the ones you need.
+        """
+        targets = list(targets) if targets else self.leaves
+        pending = self._required(targets)
+        force = set(force)
+        unknown = force - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stage(s) to force: {sorted(unknown)}")
+        done = set()
+
+        # Each stage's prints are collected and shown in one piece once it finishes,
+        # so concurrently running stages never interleave their reports.
+        self._stdout = _ThreadStdout(sys.stdout)
+        sys.stdout = self._stdout
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                running = {}
+                while pending or running:
+                    ready = [
+                        name for name in self.stages
+                        if name in pending and all(dep in done for dep in self.stages[name].deps)
+                    ]
+                    for name in ready:
+                        running[executor.submit(self._run_stage, self.stages[name], name in force)] = name
+                        pending.discard(name)
+
+                    if not running:
+                        raise ValueError(f"Dependency cycle between stages: {sorted(pending)}")
+
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        name = running.pop(future)
+                        key, output_hash, report, executed = future.result()
+                        self._keys[name], self._hashes[name] = key, output_hash
+                        done.add(name)
+                        self._report(self.stages[name], key, report, executed)
+        finally:
+            sys.stdout = self._stdout.stream
+
+        return {name: self._keys[name] for name in targets}
+
+    def _report(self, stage, key, report, executed):
+        # Stages print progress to stderr (shown live), so `report` holds results only
+        if executed:
+            print(f"✅ {stage.name}: done ({key})")
+        else:
+            print(f"⏭️  {stage.name}: up to date ({key})")
+            if not stage.show_cached_report or not report.strip():
+                return
+            print(f"📄 Cached {stage.name} report from key {key} (not recomputed):")
+        if report.strip():
+            print(report.rstrip("\n"))
+
+
+# =================================================================
+# STAGES
+# =================================================================
+
+def _fetch_dataset():
+    data_path = BettingDataLoader().download_data()
+    files = sorted(f for f in os.listdir(data_path) if "closing_odds" in f.lower())
+    # File size + mtime stand in for the content so unchanged odds are never re-parsed
+    return {
+        "data_path": data_path,
+        "files": [
+            (f, os.path.getsize(os.path.join(data_path, f)), os.path.getmtime(os.path.join(data_path, f)))
+            for f in files
+        ],
+    }
+
+
+def _load_odds(dataset):
+    return BettingDataLoader().load_data(dataset["data_path"])
+
+
+def _filter_team(raw_data):
+    return BettingDataLoader().filter_team_matches(raw_data, config.TARGET_TEAM)
+
+
+def _price_end_date():
+    """Resolved price end date - 'today' when unset, so prices refresh daily with new matches"""
+    return config.PRICE_END_DATE or date.today().isoformat()
+
+
+def _price_history():
+    return StockDataLoader().download_data(start_date=config.PRICE_START_DATE, end_date=_price_end_date())
+
+
+def _build_features(matches, stock_data):
+    engineer = AlphaFeatureEngineer()
+    features = engineer.process_matches(matches, stock_data)
+    # Keep the CSV in place for main.py / modeling.py run on their own
+    engineer.save_features(f"{config.RESULTS_DIR}/alpha_dataset.csv")
+    return features
+
+
+def _analyze(features):
+    analyzer = AlphaSignalAnalyzer()
+    overview = analyzer.generate_dataset_overview(features)
+    signals = analyzer.analyze_alpha_signals(features)
+    return {"overview": overview, "signals": signals}
+
+
+def _train_model(features):
+    import modeling
+
+    model, _, fold_metrics = modeling.generate_correction_model(features)
+    return {"model": model, "fold_metrics": fold_metrics}
+
+
+STAGES = [
+    Stage("dataset_fetch", _fetch_dataset, params=("KAGGLE_DATASET", "DATA_DIR"),
+          modules=("data_loader",), always_run=True),
+    Stage("load", _load_odds, deps=("dataset_fetch",), modules=("data_loader",)),
+    Stage("team_filter", _filter_team, deps=("load",), params=("TARGET_TEAM",), modules=("data_loader",)),
+    Stage("price_history", _price_history, params=("STOCK_TICKER", "PRICE_START_DATE"),
+          modules=("data_loader",), salt=_price_end_date),
+    Stage("features", _build_features, deps=("team_filter", "price_history"), params=("TARGET_TEAM",),
+          modules=("feature_engineering",)),
+    Stage(
+        "analysis",
+        _analyze,
+        deps=("features",),
+        params=(
+            "SURPRISE_THRESHOLD", "HIGH_WIN_PROB_THRESHOLD", "LOW_WIN_PROB_THRESHOLD",
+            "LOW_MARGIN_THRESHOLD", "HIGH_MARGIN_THRESHOLD",
+        ),
+        modules=("analysis",),
+        show_cached_report=True,
+    ),
+    Stage(
+        "model",
+        _train_model,
+        deps=("features",),
+        params=(
+            "SURPRISE_THRESHOLD", "RANDOM_STATE", "MODEL_RETRAIN_MIN_NEW_ROWS",
+            "CV_N_SPLITS", "CV_EMBARGO_DAYS",
+        ),
+        modules=("modeling", "validation", "explainability"),
+        show_cached_report=True,
+    ),
+]
+
+
+def main():
+    """Run the pipeline, e.g. `python pipeline.py analysis --force price_history`"""
+    stage_names = [stage.name for stage in STAGES]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", help="stages to bring up to date (default: analysis and model)")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE",
+                        help="re-execute this stage (repeatable)")
+    args = parser.parse_args()
+
+    for name in args.targets + args.force:
+        if name not in stage_names:
+            parser.error(f"unknown stage '{name}' (choose from {', '.join(stage_names)})")
+
+    print("🚀 Sports Betting Alpha Mining - Pipeline")
+    runner = PipelineRunner(STAGES)
+    runner.run(args.targets, force=args.force)
+    return runner
+
+
+if __name__ == "__main__":
+    main()
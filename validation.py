@@ -0,0 +1,160 @@
+"""
+Purged, embargoed time-series K-fold cross-validation for the correction model.
+Folds are trained concurrently; fold indices and quantized train pools are cached on disk.
+"""
+
+import glob
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor, Pool
+from sklearn.metrics import mean_squared_error, r2_score
+
+import config
+
+
+class PurgedTimeSeriesCV:
+    """K contiguous test blocks over match_date with purging and embargo around each block"""
+
+    def __init__(self, n_splits=None, embargo_days=None, max_workers=None, cache_dir=None):
+        self.n_splits = n_splits if n_splits is not None else config.CV_N_SPLITS
+        self.embargo_days = embargo_days if embargo_days is not None else config.CV_EMBARGO_DAYS
+        self.max_workers = max_workers if max_workers is not None else config.CV_MAX_WORKERS
+        self.cache_dir = cache_dir if cache_dir is not None else config.CACHE_DIR
+
+    def _folds_key(self, dates, label_ends):
+        digest = hashlib.sha256(dates.values.astype("datetime64[ns]").astype(np.int64).tobytes())
+        digest.update(label_ends.values.astype("datetime64[ns]").astype(np.int64).tobytes())
+        digest.update(f"{self.n_splits}-{self.embargo_days}".encode())
+        return digest.hexdigest()[:16]
+
+    def _prune(self, pattern, keep):
+        """Delete cached files of a kind that no longer belong to the current dataset"""
+        for stale in glob.glob(os.path.join(self.cache_dir, pattern)):
+            if not os.path.basename(stale).startswith(keep):
+                os.remove(stale)
+
+    def _check_folds(self, starts, ends, folds):
+        """Guard against leakage: test blocks partition the rows and no training label overlaps a block"""
+        embargo = np.timedelta64(self.embargo_days, "D")
+
+        all_test = np.sort(np.concatenate([test_idx for _, test_idx in folds]))
+        if not np.array_equal(all_test, np.arange(len(starts))):
+            raise RuntimeError("CV test blocks do not partition the dataset")
+
+        for k, (train_idx, test_idx) in enumerate(folds):
+            test_start, test_end = starts[test_idx].min(), ends[test_idx].max()
+            leaked = (ends[train_idx] >= test_start) & (starts[train_idx] <= test_end + embargo)
+            if leaked.any():
+                raise RuntimeError(f"Fold {k}: {leaked.sum()} training labels overlap the test/embargo window")
+
+    def split(self, dates: pd.Series, label_ends: pd.Series):
+        """
+        Return a list of (train_idx, test_idx) positional index arrays.
+        Each row's label spans [match_date, label_end_date]. Training rows whose label
+        overlaps the test block's span are purged; rows starting within embargo_days
+        after the last test label ends are dropped.
+        """
+        if len(dates) < self.n_splits:
+            raise ValueError(
+                f"Need at least {self.n_splits} rows for {self.n_splits}-fold CV, got {len(dates)}"
+            )
+
+        starts = dates.values.astype("datetime64[ns]")
+        ends = label_ends.values.astype("datetime64[ns]")
+        if np.isnat(ends).any() or (ends < starts).any():
+            raise ValueError("label_ends must be set and on or after the matching dates")
+        key = self._folds_key(dates, label_ends)
+        path = os.path.join(self.cache_dir, f"cv_folds_{key}.npz")
+
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                folds = [(cached[f"train_{k}"], cached[f"test_{k}"]) for k in range(self.n_splits)]
+            self._check_folds(starts, ends, folds)
+            return folds
+
+        order = np.argsort(starts, kind="stable")
+        embargo = np.timedelta64(self.embargo_days, "D")
+
+        folds = []
+        for test_idx in np.array_split(order, self.n_splits):
+            test_start, test_end = starts[test_idx].min(), ends[test_idx].max()
+            keep = (ends < test_start) | (starts > test_end + embargo)
+            train_idx = np.flatnonzero(keep)
+            folds.append((train_idx, np.sort(test_idx)))
+        self._check_folds(starts, ends, folds)
+
+        # Write atomically, the same way ShapExplainer stores its cache
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **{f"train_{k}": tr for k, (tr, _) in enumerate(folds)},
+                 **{f"test_{k}": te for k, (_, te) in enumerate(folds)})
+        os.replace(tmp_path, path)
+        self._prune("cv_folds_*.npz", f"cv_folds_{key}")
+        return folds
+
+    def _fold_pools(self, X, y, folds, folds_key):
+        """
+        Return (quantized train Pool, X_test, y_test) per fold. Quantized train pools are
+        saved under the cache dir and loaded back on later runs over the same data.
+        """
+        digest = hashlib.sha256(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+        digest.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+        prefix = f"cv_pool_{digest.hexdigest()[:16]}_{folds_key}"
+
+        pools = []
+        for k, (train_idx, test_idx) in enumerate(folds):
+            path = os.path.join(self.cache_dir, f"{prefix}_{k}.bin")
+            if not os.path.exists(path):
+                train_pool = Pool(X.iloc[train_idx], label=y.iloc[train_idx])
+                train_pool.quantize()
+                train_pool.save(f"{path}.tmp")
+                os.replace(f"{path}.tmp", path)
+            pools.append((Pool(f"quantized://{path}"), X.iloc[test_idx], y.iloc[test_idx]))
+
+        self._prune("cv_pool_*.bin", prefix)
+        return pools
+
+    @staticmethod
+    def _fit_fold(model_params, train_pool, X_test, y_test):
+        model = CatBoostRegressor(**model_params)
+        model.fit(train_pool)
+
+        preds = model.predict(X_test)
+        y_test = np.asarray(y_test, dtype=float)
+        return {
+            "train_n": train_pool.num_row(),
+            "test_n": len(y_test),
+            "rmse": np.sqrt(mean_squared_error(y_test, preds)),
+            "r2": r2_score(y_test, preds),
+            "sign_accuracy": (np.sign(preds) == np.sign(y_test)).mean(),
+        }
+
+    def evaluate(self, model_params, X: pd.DataFrame, y: pd.Series, dates: pd.Series,
+                 label_ends: pd.Series) -> pd.DataFrame:
+        """Fit one CatBoost model per fold on a bounded thread pool and return per-fold metrics"""
+        folds = self.split(dates, label_ends)
+        pools = self._fold_pools(X, y, folds, self._folds_key(dates, label_ends))
+
+        # Split the cores between concurrent folds so workers don't oversubscribe the CPU
+        workers = max(1, min(self.max_workers, len(pools)))
+        params = {**model_params, "thread_count": max(1, (os.cpu_count() or 1) // workers)}
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._fit_fold, params, *fold) for fold in pools]
+            results = [f.result() for f in futures]
+
+        return pd.DataFrame(results, index=pd.RangeIndex(len(results), name="fold"))
+
+    @staticmethod
+    def summarize(fold_metrics: pd.DataFrame) -> pd.DataFrame:
+        """Mean and dispersion of each metric across folds"""
+        metrics = fold_metrics[["rmse", "r2", "sign_accuracy"]]
+        return pd.DataFrame({
+            "mean": metrics.mean(),
+            "std": metrics.std(ddof=1),
+            "min": metrics.min(),
+            "max": metrics.max(),
+        })